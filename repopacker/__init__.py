@@ -1,10 +1,7 @@
 # repopacker/__init__.py
+# Intentionally minimal: importing the package must stay cheap (version
+# lookups, test discovery, packaging tools). The console script resolves
+# repopacker.cli:main directly and `python -m repopacker` goes through
+# __main__.py, so nothing here needs to touch cli/app/Textual.
 
 __version__ = "0.1.0"
-
-# Make main() from cli.py available at the package level
-# e.g., for `python -m repopacker`
-from .cli import main 
-
-# To make the app class available directly (optional, consider if needed for API)
-# from .app import RepoPackerApp
@@ -0,0 +1,7 @@
+# repopacker/__main__.py
+# `python -m repopacker` entry point; the cli import happens here at call
+# time so merely importing the package stays cheap.
+
+from .cli import main
+
+main()
@@ -0,0 +1,33 @@
+# repopacker/_statcache.py
+"""Per-run stat memo for the pack pipeline.
+
+One collection pass can probe the same path several times (root
+classification, size check, binary sniff). Each `Path.is_file()` /
+`Path.stat()` is an independent statx syscall; memoizing the first result by
+absolute path string makes every later probe a dict hit. The cache is
+single-shot — one instance per collection run, never invalidated — so stale
+entries cannot outlive the run that created them. The scan_tree walk
+pre-populates it from the stats the DirEntry listing already produced.
+"""
+
+import os
+from typing import Dict
+
+
+class StatCache:
+    __slots__ = ("_entries",)
+
+    def __init__(self) -> None:
+        self._entries: Dict[str, os.stat_result] = {}
+
+    def put(self, path: str, st: os.stat_result) -> None:
+        """Record a stat obtained elsewhere (e.g. from a DirEntry)."""
+        self._entries[path] = st
+
+    def stat(self, path: str) -> os.stat_result:
+        """Return the memoized stat for `path`, issuing at most one os.stat.
+        Raises OSError like os.stat when the path is unreachable."""
+        st = self._entries.get(path)
+        if st is None:
+            st = self._entries[path] = os.stat(path)
+        return st
@@ -0,0 +1,48 @@
+# repopacker/_walk.py
+"""Filesystem enumeration for the pack pipeline.
+
+One os.scandir walk serves the whole save path: directory/file classification
+comes from the d_type byte the kernel already returned with the listing
+(is_dir/is_file on the DirEntry), so enumerating a tree costs ~1 syscall per
+directory instead of ~3 stats per entry the pathlib equivalents would issue.
+The stat_result gathered per file is yielded alongside the path so downstream
+size checks reuse it instead of stat-ing again.
+"""
+
+import os
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Set, Tuple
+
+
+def scan_tree(
+    root: Path,
+    ignore: Callable[[Path], bool],
+    excluded: Optional[Set[str]] = None,
+    on_error: Optional[Callable[[str, OSError], None]] = None,
+) -> Iterator[Tuple[str, Optional[os.stat_result]]]:
+    """Yield (absolute path string, stat_result) for every non-ignored file
+    under `root`, depth-first via an explicit stack.
+
+    Ignored directories (and paths in `excluded`) are pruned before descent,
+    so ignored subtrees cost one name comparison instead of a full traversal.
+    Symlinked directories are never followed (is_dir(follow_symlinks=False));
+    symlinks to files are yielded, matching os.walk(followlinks=False)
+    semantics. The stat_result comes from DirEntry.stat() and is None when
+    the entry vanished between the listing and the stat.
+    """
+    stack: list = [str(root)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                for entry in it:
+                    if (excluded is not None and entry.path in excluded) or ignore(Path(entry.path)):
+                        continue
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        try: st = entry.stat()
+                        except OSError: st = None
+                        yield entry.path, st
+        except OSError as e:
+            if on_error is not None: on_error(current, e)
@@ -1,28 +1,51 @@
 import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import sys # Import sys to access command-line arguments
 from typing import Set, List, Optional, Iterable, Dict, Tuple
 import fnmatch
+import functools
+import mmap
+import re
+import shutil
+import stat as stat_module
+import subprocess
+import tempfile
 
 import platformdirs
 
 from textual.app import App, ComposeResult, Screen
 from textual.containers import Horizontal, Vertical, ScrollableContainer
 from textual.reactive import reactive
-from textual.widgets import Header, Footer, DirectoryTree, Button, Static, Input, Label, Markdown
+from textual.widgets import Header, Footer, DirectoryTree, Button, Static, Input, Label
 from textual.widgets._tree import TreeNode, Tree
 from textual.widgets._directory_tree import DirEntry
 from textual.binding import Binding
 from textual.screen import ModalScreen
+from textual.timer import Timer
 from textual.css.query import NoMatches
 from textual.message import Message
-from textual import events
+from textual import events, work
 from textual.style import Style
+from textual.worker import get_current_worker
 from rich.text import Text
 
 import gitignore_parser
-import pyperclip
+
+try:
+    from ._statcache import StatCache
+    from ._walk import scan_tree
+except ImportError:  # direct execution: python repopacker/app.py
+    from _statcache import StatCache
+    from _walk import scan_tree
+# Only the fallback path of _copy_to_clipboard needs pyperclip; keep the app
+# importable (and the native copy paths working) without it.
+try: import pyperclip
+except ImportError: pyperclip = None
+# Optional: compressed saves (see RepoPackerApp.compress_save).
+try: import zstandard
+except ImportError: zstandard = None
 
 # --- Configuration ---
 APP_NAME = "RepoPackerTUI"
@@ -49,30 +72,225 @@ DEFAULT_IGNORES = [
 ]
 MAX_FILE_SIZE_MB = 10
 MAX_RECENT_ENTRIES = 10
+# Per-keystroke diagnostic logging in the tree; formatting and queueing these
+# costs real time during held-key navigation even with no devtools attached.
+DEBUG = False
+
+# Per-file element of the packed output, formatted once per file.
+_FILE_TEMPLATE = '\n<file path="{p}">{c}</file>'
+
+# The <file_summary> preamble is static apart from the project name; joined
+# once at import (MAX_FILE_SIZE_MB baked in) so building a pack header is one
+# format call instead of ~35 string appends.
+_SUMMARY_HEADER = "\n".join(["<file_summary>", "This section contains a summary of this file.", "", "<purpose>", "This file contains a packed representation of selected repository contents.", "It is designed to be easily consumable by AI systems for analysis, code review,","or other automated processes.","</purpose>","","<file_format>", "The content is organized as follows:","1. This summary section","2. Directory structure of selected files","3. Selected repository files, each consisting of:","  - File path as an attribute (relative to project root)","  - Full contents of the file","</file_format>","","<usage_guidelines>","- This file should be treated as read-only. Any changes should be made to the","  original repository files, not this packed version.","- When processing this file, use the file path to distinguish","  between different files in the repository.","- Be aware that this file may contain sensitive information. Handle it with","  the same level of security as you would the original repository.","</usage_guidelines>","","<notes>","- Files are selected based on user interaction and ignore rules.","- Binary files (based on a heuristic) are excluded.","- Files matching patterns in .gitignore (if present) and default ignore patterns (e.g., .git, __pycache__) are typically excluded from selection and packing.",f"- File size limits may apply (currently >{MAX_FILE_SIZE_MB}MB excluded).","</notes>","","<additional_info>","Generated by RepoPacker TUI from project: {project}","</additional_info>","</file_summary>","","<directory_structure>"])
+
+_GLOB_CHARS = frozenset("*?[")
+
+@functools.cache
+def _partition_ignore_patterns(patterns: Tuple[str, ...]) -> Tuple[frozenset, Optional[re.Pattern], frozenset, frozenset, Optional[re.Pattern]]:
+    """Split ignore patterns into fast lookup structures: literal directory
+    names, a combined regex for glob directory patterns, literal file names,
+    `*.ext` suffixes, and a combined regex for the remaining file globs.
+    Cached so repeated tree instances with the same patterns skip the
+    fnmatch.translate + re.compile work entirely."""
+    dir_names, dir_globs, exact_names, suffixes, globs = set(), [], set(), set(), []
+    for pattern_str in patterns:
+        if pattern_str.endswith('/'):
+            name = pattern_str.rstrip('/')
+            if _GLOB_CHARS.isdisjoint(name): dir_names.add(name)
+            else: dir_globs.append(name)
+        elif pattern_str.startswith('*.') and _GLOB_CHARS.isdisjoint(pattern_str[2:]) and '.' not in pattern_str[2:]:
+            suffixes.add(pattern_str[1:])
+        elif _GLOB_CHARS.isdisjoint(pattern_str):
+            exact_names.add(pattern_str)
+        else:
+            globs.append(pattern_str)
+    dir_glob_re = re.compile("|".join(fnmatch.translate(p) for p in dir_globs)) if dir_globs else None
+    glob_re = re.compile("|".join(fnmatch.translate(p) for p in globs)) if globs else None
+    return frozenset(dir_names), dir_glob_re, frozenset(exact_names), frozenset(suffixes), glob_re
+
+# Partitioned once at import; every tree without extra patterns shares these.
+_DEFAULT_IGNORE_STRUCTURES = _partition_ignore_patterns(tuple(DEFAULT_IGNORES))
+
+# Compiled .gitignore matchers shared across tree rebuilds, keyed by the
+# .gitignore path and invalidated when its mtime changes. `None` records a
+# directory with no .gitignore so repeated misses stay cheap.
+_MATCHER_CACHE: Dict[str, Tuple[int, Optional[callable]]] = {}
+
+def _get_gitignore_matcher(gitignore_dir: Path, log=None) -> Optional[callable]:
+    gf_path = gitignore_dir / ".gitignore"
+    gf_path_str = str(gf_path)
+    try: mtime_ns = os.stat(gf_path_str).st_mtime_ns
+    except OSError: mtime_ns = -1  # no .gitignore here
+    cached = _MATCHER_CACHE.get(gf_path_str)
+    if cached is not None and cached[0] == mtime_ns: return cached[1]
+    matcher: Optional[callable] = None
+    if mtime_ns != -1:
+        try: matcher = gitignore_parser.parse_gitignore(gf_path_str, base_dir=str(gitignore_dir.resolve()))
+        except Exception as e:
+            if log: log(f"Warning: Parse {gf_path}: {e}")
+            matcher = None
+    _MATCHER_CACHE[gf_path_str] = (mtime_ns, matcher)
+    return matcher
 
-# --- Helper Functions (no changes) ---
+# Extensions that are always binary: classified without any syscalls, where
+# the sniff costs an open/read/close per file. Most of these are also ignore
+# patterns, but files selected explicitly (or ignored patterns overridden)
+# still reach the binary check.
+_BINARY_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".bmp", ".ico", ".webp", ".pdf",
+    ".zip", ".tar", ".gz", ".bz2", ".xz", ".7z", ".rar",
+    ".woff", ".woff2", ".ttf", ".otf", ".eot",
+    ".so", ".dll", ".dylib", ".exe", ".o", ".a", ".class", ".jar", ".pyc",
+    ".mp3", ".mp4", ".wav", ".ogg", ".avi", ".mov", ".mkv", ".webm",
+    ".sqlite", ".db", ".wasm",
+})
+
+# Extensions that are always treated as text: checking a frozenset is far
+# cheaper than opening and sniffing the file.
+_TEXT_EXTENSIONS = frozenset({
+    ".py", ".pyi", ".txt", ".md", ".rst", ".js", ".jsx", ".ts", ".tsx", ".json",
+    ".yaml", ".yml", ".toml", ".ini", ".cfg", ".html", ".htm", ".css", ".scss",
+    ".xml", ".csv", ".sh", ".bash", ".zsh", ".c", ".h", ".cpp", ".hpp", ".cc",
+    ".rs", ".go", ".java", ".kt", ".rb", ".php", ".pl", ".lua", ".sql", ".vim",
+})
+
+# --- Helper Functions ---
 def is_binary_heuristic(filepath: Path, sample_size=1024) -> bool:
+    suffix = filepath.suffix.lower()
+    if suffix in _TEXT_EXTENSIONS: return False
+    if suffix in _BINARY_EXTENSIONS: return True
     try:
-        with open(filepath, 'rb') as f: sample = f.read(sample_size)
-        return b'\0' in sample
+        # Raw os.open/os.read skips the BufferedReader setup of open('rb').
+        fd = os.open(filepath, os.O_RDONLY)
+        try: sample = os.read(fd, sample_size)
+        finally: os.close(fd)
+        return sample.find(0) != -1  # int needle goes straight to memchr
     except Exception: return True
 
 def get_file_size_mb(filepath: Path) -> float:
     try: return filepath.stat().st_size / (1024 * 1024)
     except OSError: return float('inf')
 
+def inspect_file(filepath: Path, sample_size=1024) -> Tuple[float, bool]:
+    """Fused size + binary check: one open, size via fstat on the open fd,
+    null-byte sniff from the same fd. Returns (size_mb, is_binary)."""
+    try:
+        suffix = filepath.suffix.lower()
+        if suffix in _BINARY_EXTENSIONS: return float('inf'), True  # size is moot once excluded
+        fd = os.open(filepath, os.O_RDONLY)
+        try:
+            size_mb = os.fstat(fd).st_size / (1024 * 1024)
+            if suffix in _TEXT_EXTENSIONS: return size_mb, False
+            return size_mb, os.read(fd, sample_size).find(0) != -1
+        finally: os.close(fd)
+    except Exception: return float('inf'), True
+
+# fdatasync skips the metadata flush where the platform offers it (Linux).
+_fsync = getattr(os, "fdatasync", os.fsync)
+
+# Files at or above this size are mapped rather than read: the writer consumes
+# the mmap through the buffer protocol, so the payload never lands in a Python
+# bytes object and peak memory for a big generated file stays ~0 instead of
+# its full size.
+_MMAP_THRESHOLD = 1 << 20
+
+def _read_for_pack(path: Path):
+    """Read `path` for the pack writer: bytes for small files, a read-only
+    mmap (with a sequential-readahead hint) at _MMAP_THRESHOLD and above.
+    The mapping stays valid after the fd is closed; the caller closes it
+    once the chunk has been written."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        size = os.fstat(fd).st_size
+        if size >= _MMAP_THRESHOLD:
+            if hasattr(os, "posix_fadvise"): os.posix_fadvise(fd, 0, size, os.POSIX_FADV_SEQUENTIAL)
+            return mmap.mmap(fd, size, access=mmap.ACCESS_READ)
+        chunks = []
+        while size > 0:
+            chunk = os.read(fd, size)
+            if not chunk: break
+            chunks.append(chunk); size -= len(chunk)
+        return chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    finally:
+        os.close(fd)
+
+@functools.lru_cache(maxsize=64)
+def _render_selected_files_md(rel_paths: Tuple[str, ...]) -> str:
+    """Render the sidebar body for a given file set; toggling a selection
+    back and forth replays the same sets, so a small LRU skips the rebuild.
+    The body is Rich markup for a Static — it is a plain list, so routing it
+    through Textual's markdown parser bought nothing."""
+    if not rel_paths: return "[b]Selected Files[/b]\n\n[i]No packable files based on current selection.[/i]"
+    return f"[b]Selected Files ({len(rel_paths)})[/b]\n\n" + "\n".join(f"• {p}" for p in rel_paths)
+
+# Native clipboard commands that exist on this box, resolved once per process
+# (shutil.which walks PATH and stats candidates); None until first use.
+_clip_commands: Optional[List[List[str]]] = None
+
+def _copy_to_clipboard(chunks: List[str]) -> None:
+    """Copy through the native clipboard interface where that is direct and
+    cheap; pyperclip stays as the fallback (its Windows path can shell out to
+    a script costing ~1s per copy, which freezes the TUI on large packs).
+    Takes the pack's chunk list and streams each chunk into the clipboard
+    process as it is encoded, so the full document is only joined into one
+    string on the paths whose API demands it (win32, pyperclip)."""
+    global _clip_commands
+    if sys.platform == "win32":
+        import ctypes
+        CF_UNICODETEXT = 13; GMEM_MOVEABLE = 0x0002
+        user32 = ctypes.windll.user32; kernel32 = ctypes.windll.kernel32
+        data = "".join(chunks).encode("utf-16-le") + b"\x00\x00"
+        if not user32.OpenClipboard(0): raise RuntimeError("OpenClipboard failed")
+        try:
+            user32.EmptyClipboard()
+            handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, len(data))
+            locked = kernel32.GlobalLock(handle)
+            ctypes.memmove(locked, data, len(data)); kernel32.GlobalUnlock(handle)
+            if not user32.SetClipboardData(CF_UNICODETEXT, handle): raise RuntimeError("SetClipboardData failed")
+        finally: user32.CloseClipboard()
+        return
+    if _clip_commands is None:
+        candidates = (["pbcopy"],) if sys.platform == "darwin" else (["wl-copy"], ["xclip", "-selection", "clipboard"])
+        _clip_commands = [command for command in candidates if shutil.which(command[0])]
+    for command in _clip_commands:
+        proc = subprocess.Popen(command, stdin=subprocess.PIPE)
+        try:
+            with proc.stdin:
+                for chunk in chunks: proc.stdin.write(chunk.encode("utf-8"))
+        except BrokenPipeError: pass  # fall through to the returncode check
+        if proc.wait() == 0: return
+    if pyperclip is None: raise RuntimeError("No clipboard mechanism available (install pyperclip, wl-clipboard or xclip).")
+    pyperclip.copy("".join(chunks))
+
+# Parsed-and-validated recent list, cached against the file's mtime so
+# repeated loads don't re-stat every entry.
+_recent_folders_cache: Optional[Tuple[int, List[Path]]] = None
+
 def load_recent_folders() -> List[Path]:
-    if not RECENT_FOLDERS_FILE.exists(): return []
+    global _recent_folders_cache
+    try: mtime_ns = RECENT_FOLDERS_FILE.stat().st_mtime_ns
+    except OSError: return []
+    if _recent_folders_cache is not None and _recent_folders_cache[0] == mtime_ns:
+        return list(_recent_folders_cache[1])
     try:
-        with open(RECENT_FOLDERS_FILE, "r", encoding="utf-8") as f:
-            return [Path(line.strip()) for line in f if Path(line.strip()).is_dir()][:MAX_RECENT_ENTRIES]
+        lines = RECENT_FOLDERS_FILE.read_text(encoding="utf-8").splitlines()
+        folders = [p for p in (Path(line.strip()) for line in lines if line.strip()) if p.is_dir()][:MAX_RECENT_ENTRIES]
     except Exception: return []
+    _recent_folders_cache = (mtime_ns, folders)
+    return list(folders)
+
+def _promote_recent(folder_path: Path, current_list: List[Path]) -> List[Path]:
+    """Most-recently-used ordering shared by the in-memory list and the file."""
+    return ([folder_path] + [p for p in current_list if p != folder_path])[:MAX_RECENT_ENTRIES]
 
 def save_recent_folders(folder_path: Path, current_list: List[Path]):
-    new_list = [folder_path] + [p for p in current_list if p != folder_path]
+    global _recent_folders_cache
+    new_list = _promote_recent(folder_path, current_list)
     try:
         with open(RECENT_FOLDERS_FILE, "w", encoding="utf-8") as f:
-            for p in new_list[:MAX_RECENT_ENTRIES]: f.write(str(p) + "\n")
+            for p in new_list: f.write(str(p) + "\n")
+        _recent_folders_cache = None
     except Exception as e: print(f"Error saving recent folders to {RECENT_FOLDERS_FILE}: {e}")
 
 
@@ -83,149 +301,257 @@ class CheckableDirectoryTree(DirectoryTree): # (Keep as is from previous correct
         Binding("s", "toggle_selection_recursive_cursor", "Select Item Recursively (S)", show=False, priority=True),
     ]
     class SelectionChanged(Message):
-        def __init__(self, selected_paths: Set[Path], project_root: Path) -> None:
+        # Snapshots are frozensets: immutable, so they can be shared with
+        # every receiver without the O(n) defensive copy per message.
+        def __init__(self, selected_paths: frozenset, project_root: Path) -> None:
             super().__init__(); self.selected_paths = selected_paths; self.project_root = project_root
     def __init__(self, path: str, id: Optional[str] = None, ignored_patterns: Optional[List[str]] = None):
         super().__init__(path, id=id)
+        # Selection is prefix-compressed: selected_paths holds only explicitly
+        # selected roots (a selected directory stands for its whole subtree)
+        # and _deselected_under records subtrees pruned back out per root.
+        # _is_selected derives effective membership.
         self.selected_paths: Set[Path] = set(); self.project_root = Path(path).resolve()
+        self._deselected_under: Dict[Path, Set[Path]] = {}
+        self._root_str = str(self.project_root).rstrip(os.sep) + os.sep  # prefix test beats is_relative_to per call
         self._gitignore_matchers: dict[Path, Optional[callable]] = {}; self.additional_ignored_patterns = ignored_patterns or []
-        self._ignored_paths_cache: Dict[Path, bool] = {}; self._binary_heuristic_cache: Dict[Path, bool] = {}
-        self._file_size_cache: Dict[Path, float] = {}; self._precompiled_default_ignores: List[Tuple[str, bool, str]] = []
-        for pattern_str in DEFAULT_IGNORES + self.additional_ignored_patterns:
-            is_dir_pattern = pattern_str.endswith('/'); normalized_name_pattern = pattern_str.rstrip('/') if is_dir_pattern else pattern_str
-            self._precompiled_default_ignores.append((normalized_name_pattern, is_dir_pattern, pattern_str))
+        self._ignored_paths_cache: Dict[str, bool] = {}; self._binary_heuristic_cache: Dict[Path, bool] = {}
+        self._file_size_cache: Dict[Path, float] = {}
+        self._gitignore_chain: Optional[List[Tuple[str, Path]]] = None  # built lazily, see _get_gitignore_chain
+        self._dir_flags: Dict[str, bool] = {}  # d_type verdicts from _load_directory, reused by _safe_is_dir
+        # Effective-selection verdicts, recomputed per path at most once
+        # between selection mutations; render_label asks for every visible
+        # row on every refresh, so this turns the roots loop into a dict hit.
+        self._selected_cache: Dict[Path, bool] = {}
+        self._selection_changed_timer: Optional[Timer] = None
+        (self._ignore_dir_names, self._ignore_dir_glob_re, self._ignore_exact_names,
+         self._ignore_suffixes, self._ignore_glob_re) = (
+            _partition_ignore_patterns(tuple(DEFAULT_IGNORES + self.additional_ignored_patterns))
+            if self.additional_ignored_patterns else _DEFAULT_IGNORE_STRUCTURES)
     def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
         for path_obj in paths:
             if not self._is_path_ignored(path_obj): yield path_obj
-    def _is_path_ignored(self, path_obj: Path) -> bool:
-        abs_path_obj = path_obj.resolve() if not path_obj.is_absolute() else path_obj.resolve()
-        if abs_path_obj in self._ignored_paths_cache: return self._ignored_paths_cache[abs_path_obj]
+    @work(thread=True, exit_on_error=False)
+    def _load_directory(self, node: TreeNode[DirEntry]) -> List[Path]:
+        """scandir-based replacement for DirectoryTree._load_directory: one
+        getdents pass per directory supplies name, path and d_type together,
+        where the stock loader resolves the directory and then stats every
+        child twice (sort key + allow_expand). The is_dir verdicts are stashed
+        so _populate_node's _safe_is_dir calls are dict hits. Nodes stay
+        lazy -- children are only listed when their directory is expanded."""
+        assert node.data is not None
+        worker = get_current_worker()
+        entries: List[Tuple[bool, Path]] = []
         try:
-            if not abs_path_obj.is_relative_to(self.project_root) and abs_path_obj != self.project_root:
-                self._ignored_paths_cache[abs_path_obj] = True; return True
-        except ValueError: self._ignored_paths_cache[abs_path_obj] = True; return True
-        for compiled_name_pattern, is_dir_pattern, original_fnmatch_pattern in self._precompiled_default_ignores:
-            if is_dir_pattern:
-                if (abs_path_obj.is_dir() and abs_path_obj.name == compiled_name_pattern) or \
-                   compiled_name_pattern in abs_path_obj.parts:
-                    self._ignored_paths_cache[abs_path_obj] = True; return True
-            elif fnmatch.fnmatch(abs_path_obj.name, original_fnmatch_pattern):
-                self._ignored_paths_cache[abs_path_obj] = True; return True
-        path_to_check_str = str(abs_path_obj); dirs_to_check_for_gitignore = [self.project_root]
-        try: 
-            if abs_path_obj.parent != self.project_root and abs_path_obj.parent.is_relative_to(self.project_root):
-                current_dir = abs_path_obj.parent
-                while current_dir != self.project_root and current_dir != current_dir.parent :
-                    dirs_to_check_for_gitignore.append(current_dir)
-                    if not current_dir.is_relative_to(self.project_root): break 
-                    current_dir = current_dir.parent
-        except ValueError: pass 
-        for gitignore_dir in reversed(dirs_to_check_for_gitignore): 
-            matcher = self._gitignore_matchers.get(gitignore_dir)
-            if matcher is None:
-                gf_path = gitignore_dir / ".gitignore"
-                if gf_path.is_file():
-                    try: matcher = gitignore_parser.parse_gitignore(str(gf_path), base_dir=str(gitignore_dir.resolve()))
-                    except Exception as e: self.app.log(f"Warning: Parse {gf_path}: {e}"); matcher = lambda p: False
-                else: matcher = lambda p: False
-                self._gitignore_matchers[gitignore_dir] = matcher
-            if callable(matcher) and matcher(path_to_check_str):
-                self._ignored_paths_cache[abs_path_obj] = True; return True
-        self._ignored_paths_cache[abs_path_obj] = False; return False
-    def _is_node_effectively_selected_file(self, file_path: Path) -> bool:
-        if self._is_path_ignored(file_path): return False 
+            with os.scandir(node.data.path) as it:
+                for entry in it:
+                    if worker.is_cancelled: break
+                    child = Path(entry.path)
+                    if self._is_path_ignored(child): continue
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    self._dir_flags[entry.path] = is_dir
+                    entries.append((is_dir, child))
+        except OSError: pass
+        entries.sort(key=lambda item: (not item[0], item[1].name.lower()))
+        return [child for _is_dir, child in entries]
+    def _safe_is_dir(self, path: Path) -> bool:
+        cached = self._dir_flags.get(str(path))
+        if cached is not None: return cached
+        return DirectoryTree._safe_is_dir(path)
+    def reload(self):
+        # Drop memoized ignore results and matcher refs so a refresh re-checks
+        # .gitignore files (the module-level matcher cache revalidates by mtime).
+        self._ignored_paths_cache.clear(); self._gitignore_matchers.clear()
+        self._binary_heuristic_cache.clear(); self._file_size_cache.clear()
+        self._gitignore_chain = None; self._dir_flags.clear(); self._selected_cache.clear()
+        return super().reload()
+    def _get_gitignore_chain(self) -> List[Tuple[str, Path]]:
+        """Enumerate every .gitignore under the project root once (pruning
+        ignored dirs), as (dir prefix, dir) pairs sorted outermost-first."""
+        if self._gitignore_chain is None:
+            chain: List[Tuple[str, Path]] = []
+            try:
+                for root, dirs, files in os.walk(self.project_root):
+                    dirs[:] = [d for d in dirs if d not in self._ignore_dir_names]
+                    if ".gitignore" in files:
+                        root_path = Path(root)
+                        chain.append((str(root_path).rstrip(os.sep) + os.sep, root_path))
+            except OSError as e: self.app.log(f"OS Error scanning for .gitignore files: {e}")
+            chain.sort(key=lambda item: len(item[0]))
+            self._gitignore_chain = chain
+        return self._gitignore_chain
+    def _is_path_ignored(self, path_obj: Path) -> bool:
+        abs_path_obj = path_obj if path_obj.is_absolute() else path_obj.resolve()
+        cache_key = str(abs_path_obj)
+        cached = self._ignored_paths_cache.get(cache_key)
+        if cached is not None: return cached
+        if not (cache_key.startswith(self._root_str) or cache_key == self._root_str[:-1]):
+            self._ignored_paths_cache[cache_key] = True; return True
+        # Negative-path cache: an ignored directory ignores its whole subtree
+        # (gitignore semantics), so a descendant resolves off the memoized
+        # ancestor verdict without re-running patterns or matchers. The first
+        # query under a directory pays the ancestor chain once; every sibling
+        # after that is a dict hit.
+        parent_str = os.path.dirname(cache_key)
+        if len(parent_str) > len(self._root_str) and self._is_path_ignored(Path(parent_str)):
+            self._ignored_paths_cache[cache_key] = True; return True
+        parts = abs_path_obj.parts; name = abs_path_obj.name
+        if self._ignore_dir_names.intersection(parts) or \
+           (self._ignore_dir_glob_re is not None and any(self._ignore_dir_glob_re.match(part) for part in parts)) or \
+           name in self._ignore_exact_names or abs_path_obj.suffix in self._ignore_suffixes or \
+           (self._ignore_glob_re is not None and self._ignore_glob_re.match(name) is not None):
+            self._ignored_paths_cache[cache_key] = True; return True
+        path_to_check_str = cache_key
+        for dir_prefix, gitignore_dir in self._get_gitignore_chain():
+            if not path_to_check_str.startswith(dir_prefix): continue
+            if gitignore_dir not in self._gitignore_matchers:
+                self._gitignore_matchers[gitignore_dir] = _get_gitignore_matcher(gitignore_dir, log=self.app.log)
+            matcher = self._gitignore_matchers[gitignore_dir]
+            if matcher is not None and matcher(path_to_check_str):
+                self._ignored_paths_cache[cache_key] = True; return True
+        self._ignored_paths_cache[cache_key] = False; return False
+    def _file_passes_content_checks(self, file_path: Path, stat_result: Optional[os.stat_result] = None) -> bool:
         is_bin = self._binary_heuristic_cache.get(file_path)
-        if is_bin is None: is_bin = is_binary_heuristic(file_path); self._binary_heuristic_cache[file_path] = is_bin
-        if is_bin: return False
         size_mb = self._file_size_cache.get(file_path)
-        if size_mb is None: size_mb = get_file_size_mb(file_path); self._file_size_cache[file_path] = size_mb
-        if size_mb > MAX_FILE_SIZE_MB: return False
-        if file_path in self.selected_paths: return True
-        current_parent = file_path.parent
-        while current_parent != self.project_root.parent and current_parent != current_parent.parent : 
-            try: is_relevant_parent = (current_parent == self.project_root or current_parent.is_relative_to(self.project_root))
-            except ValueError: is_relevant_parent = False
-            if not is_relevant_parent: break 
-            if current_parent in self.selected_paths: return True
-            if current_parent == self.project_root: break 
-            current_parent = current_parent.parent
+        if is_bin is None or size_mb is None:
+            if stat_result is not None:
+                # Size comes free with the walk's DirEntry.stat(); only the
+                # null-byte sniff (skipped for oversize files) opens the file.
+                size_mb = stat_result.st_size / (1024 * 1024)
+                is_bin = is_binary_heuristic(file_path) if size_mb <= MAX_FILE_SIZE_MB else True
+            else:
+                size_mb, is_bin = inspect_file(file_path)
+            self._file_size_cache[file_path] = size_mb; self._binary_heuristic_cache[file_path] = is_bin
+        return not is_bin and size_mb <= MAX_FILE_SIZE_MB
+    def _is_selected(self, path_obj: Path) -> bool:
+        cached = self._selected_cache.get(path_obj)
+        if cached is None: cached = self._selected_cache[path_obj] = self._compute_is_selected(path_obj)
+        return cached
+    def _compute_is_selected(self, path_obj: Path) -> bool:
+        """Effective selection test over the compressed representation: the
+        path itself is a selected root, or some selected ancestor covers it
+        and no recorded deselection prunes it back out. Covering roots are
+        found by hashing the ancestor chain against the root set -- O(depth)
+        lookups -- rather than testing every root with is_relative_to."""
+        if path_obj in self.selected_paths: return True
+        if self.selected_paths.isdisjoint(path_obj.parents): return False
+        for root in path_obj.parents:
+            if root not in self.selected_paths: continue
+            excludes = self._deselected_under.get(root)
+            if not excludes: return True
+            if not any(path_obj == ex or path_obj.is_relative_to(ex) for ex in excludes): return True
         return False
+    def _deselect_subtree(self, node_fs_path: Path) -> None:
+        self._selected_cache.clear()
+        self.selected_paths = {r for r in self.selected_paths if not (r == node_fs_path or r.is_relative_to(node_fs_path))}
+        self._deselected_under = {r: ex for r, ex in self._deselected_under.items() if r in self.selected_paths}
+        for root in self.selected_paths:
+            try:
+                if node_fs_path.is_relative_to(root):
+                    self._deselected_under.setdefault(root, set()).add(node_fs_path)
+            except ValueError: continue
+    def _is_node_effectively_selected_file(self, file_path: Path) -> bool:
+        if self._is_path_ignored(file_path): return False
+        if not self._file_passes_content_checks(file_path): return False
+        return self._is_selected(file_path)
+    # Rendered for every visible row on every refresh; build these once.
+    _SELECTED_PREFIX = Text.from_markup("[green]✓ [/]")
+    _UNSELECTED_PREFIX = Text("  ")
+    _PACK_SUFFIX = Text(" [b #40E0D0](pack)[/b]", no_wrap=True)
     def render_label(self, node: TreeNode[DirEntry], base_style: Style, style: Style) -> Text:
         rendered_label_from_super = super().render_label(node, base_style, style)
-        if node.data is None: return Text("Error: No data") 
+        if node.data is None: return Text("Error: No data")
         node_fs_path = node.data.path
-        is_directly_selected = node_fs_path in self.selected_paths
-        prefix_text = Text.from_markup("[green]✓ [/]" if is_directly_selected else "  ")
-        final_renderable = Text("").append(prefix_text).append(rendered_label_from_super)
-        if node_fs_path.is_file() and self._is_node_effectively_selected_file(node_fs_path): 
-            final_renderable.append_text(Text(" [b #40E0D0](pack)[/b]", no_wrap=True))
-        return final_renderable
+        prefix_text = self._SELECTED_PREFIX if self._is_selected(node_fs_path) else self._UNSELECTED_PREFIX
+        # allow_expand was set from the scandir pass that populated the node,
+        # so it distinguishes files from dirs without another stat per row.
+        if not node.allow_expand and self._is_node_effectively_selected_file(node_fs_path):
+            return Text.assemble(prefix_text, rendered_label_from_super, self._PACK_SUFFIX)
+        return Text.assemble(prefix_text, rendered_label_from_super)
+    def _schedule_selection_changed(self) -> None:
+        # Coalesce bursts of toggles (held keys, recursive selection) into a
+        # single SelectionChanged so the sidebar rebuilds once, not per press.
+        if self._selection_changed_timer is not None: self._selection_changed_timer.stop()
+        self._selection_changed_timer = self.set_timer(0.05, self._emit_selection_changed)
+    def _emit_selection_changed(self) -> None:
+        self._selection_changed_timer = None
+        self.post_message(self.SelectionChanged(frozenset(self.selected_paths), self.project_root))
     def _toggle_single_node_selection(self, node_fs_path: Path):
-        self.app.log(f"Toggling single selection: {node_fs_path}")
-        if node_fs_path in self.selected_paths: self.selected_paths.discard(node_fs_path)
+        if DEBUG: self.app.log(f"Toggling single selection: {node_fs_path}")
+        if self._is_selected(node_fs_path): self._deselect_subtree(node_fs_path)
         else:
-            if self._is_path_ignored(node_fs_path): 
-                self.app.log(f"Path ignored, not selecting: {node_fs_path}"); self.app.bell(); return
+            if self._is_path_ignored(node_fs_path):
+                if DEBUG: self.app.log(f"Path ignored, not selecting: {node_fs_path}")
+                self.app.bell(); return
+            self._selected_cache.clear()
             self.selected_paths.add(node_fs_path)
-        self.refresh(); self.post_message(self.SelectionChanged(self.selected_paths.copy(), self.project_root))
+            for excludes in self._deselected_under.values(): excludes.discard(node_fs_path)
+        self.refresh(); self._schedule_selection_changed()
     def _toggle_node_and_children_selection(self, node_fs_path: Path):
-        self.app.log(f"Toggling node and children selection: {node_fs_path}")
-        is_currently_selected = node_fs_path in self.selected_paths
-        new_select_state = not is_currently_selected
+        if DEBUG: self.app.log(f"Toggling node and children selection: {node_fs_path}")
+        new_select_state = not self._is_selected(node_fs_path)
         self._apply_selection_recursive(node_fs_path, new_select_state)
-        self.refresh(); self.post_message(self.SelectionChanged(self.selected_paths.copy(), self.project_root))
+        self.refresh(); self._schedule_selection_changed()
     def _apply_selection_recursive(self, node_fs_path: Path, select_state: bool):
+        # With prefix-compressed selection this is O(selected roots), not
+        # O(subtree): selecting records one root, deselecting records a prune
+        # (or removes roots). Descendants are enumerated lazily at pack time.
         if select_state:
-            if not self._is_path_ignored(node_fs_path): self.selected_paths.add(node_fs_path)
-        else: self.selected_paths.discard(node_fs_path)
-        if node_fs_path.is_dir():
-            try:
-                for child_item_path in self.filter_paths(node_fs_path.iterdir()): 
-                    self._apply_selection_recursive(child_item_path, select_state)
-            except OSError as e: self.app.log(f"OS Error applying recursive selection for {node_fs_path}: {e}")
+            if self._is_path_ignored(node_fs_path): return
+            self._selected_cache.clear()
+            # Roots already covered by the new root become redundant.
+            self.selected_paths = {r for r in self.selected_paths if not (r != node_fs_path and r.is_relative_to(node_fs_path))}
+            self.selected_paths.add(node_fs_path)
+            self._deselected_under = {
+                root: {ex for ex in excludes if not (ex == node_fs_path or ex.is_relative_to(node_fs_path))}
+                for root, excludes in self._deselected_under.items() if root in self.selected_paths}
+        else: self._deselect_subtree(node_fs_path)
     def action_toggle_expand_or_select(self) -> None:
         if self.cursor_node and self.cursor_node.data:
             node_fs_path = self.cursor_node.data.path
             if node_fs_path.is_dir():
-                self.app.log(f"Enter on dir: {node_fs_path}, calling action_toggle_node. Current expanded: {self.cursor_node._expanded}")
+                if DEBUG: self.app.log(f"Enter on dir: {node_fs_path}, calling action_toggle_node. Current expanded: {self.cursor_node._expanded}")
                 self.action_toggle_node() 
-                self.app.log(f"After action_toggle_node (Enter). New expanded: {self.cursor_node._expanded}")
+                if DEBUG: self.app.log(f"After action_toggle_node (Enter). New expanded: {self.cursor_node._expanded}")
     def action_space_pressed_on_item(self) -> None:
         if self.cursor_node and self.cursor_node.data:
             node_fs_path = self.cursor_node.data.path
-            self.app.log(f"action_space_pressed_on_item on: {node_fs_path}")
+            if DEBUG: self.app.log(f"action_space_pressed_on_item on: {node_fs_path}")
             if node_fs_path.is_file():
-                self.app.log(f"Space on file: {node_fs_path}, toggling single selection.")
+                if DEBUG: self.app.log(f"Space on file: {node_fs_path}, toggling single selection.")
                 self._toggle_single_node_selection(node_fs_path)
             elif node_fs_path.is_dir():
-                self.app.log(f"Space on dir: {node_fs_path}, calling action_toggle_node. Current expanded: {self.cursor_node._expanded}")
+                if DEBUG: self.app.log(f"Space on dir: {node_fs_path}, calling action_toggle_node. Current expanded: {self.cursor_node._expanded}")
                 self.action_toggle_node() 
-                self.app.log(f"After action_toggle_node (Space). New expanded: {self.cursor_node._expanded}")
-        else: self.app.log("action_space_pressed_on_item: No cursor node or data.")
+                if DEBUG: self.app.log(f"After action_toggle_node (Space). New expanded: {self.cursor_node._expanded}")
+        else:
+            if DEBUG: self.app.log("action_space_pressed_on_item: No cursor node or data.")
     def on_tree_node_selected(self, event: Tree.NodeSelected[DirEntry]) -> None:
         event.stop() 
         if event.node is None or event.node.data is None:
-            self.app.log("Tree.NodeSelected (likely click) event with no node or no data."); return
+            if DEBUG: self.app.log("Tree.NodeSelected (likely click) event with no node or no data.")
+            return
         node_fs_path = event.node.data.path
-        self.app.log(f"Click (Tree.NodeSelected event) on: {node_fs_path}")
+        if DEBUG: self.app.log(f"Click (Tree.NodeSelected event) on: {node_fs_path}")
         if node_fs_path.is_file():
-            self.app.log(f"Click on file: {node_fs_path}, toggling single selection.")
+            if DEBUG: self.app.log(f"Click on file: {node_fs_path}, toggling single selection.")
             self._toggle_single_node_selection(node_fs_path)
         elif node_fs_path.is_dir():
-            self.app.log(f"Click on dir: {node_fs_path}. Expansion may be handled by default DirectoryTree click behavior. Current expanded state (before potential default toggle): {event.node._expanded}")
+            if DEBUG: self.app.log(f"Click on dir: {node_fs_path}. Expansion may be handled by default DirectoryTree click behavior. Current expanded state (before potential default toggle): {event.node._expanded}")
     def action_toggle_selection_recursive_cursor(self) -> None:
         self.app.bell() 
-        self.app.log("--- 'S' KEY ACTION CALLED (toggle_selection_recursive_cursor) ---") 
+        if DEBUG: self.app.log("--- 'S' KEY ACTION CALLED (toggle_selection_recursive_cursor) ---") 
         if self.cursor_node and self.cursor_node.data:
             node_fs_path = self.cursor_node.data.path
-            self.app.log(f"'s' key on: {node_fs_path}")
+            if DEBUG: self.app.log(f"'s' key on: {node_fs_path}")
             if node_fs_path.is_file():
-                self.app.log(f"'s' key on file: {node_fs_path}, toggling single selection.")
+                if DEBUG: self.app.log(f"'s' key on file: {node_fs_path}, toggling single selection.")
                 self._toggle_single_node_selection(node_fs_path)
             elif node_fs_path.is_dir():
-                self.app.log(f"'s' key on dir: {node_fs_path}, toggling recursive selection.")
+                if DEBUG: self.app.log(f"'s' key on dir: {node_fs_path}, toggling recursive selection.")
                 self._toggle_node_and_children_selection(node_fs_path)
-        else: self.app.log("'s' key pressed but no cursor node or data.")
+        else:
+            if DEBUG: self.app.log("'s' key pressed but no cursor node or data.")
     async def on_key(self, event: events.Key) -> None:
         key_handled_by_us = False
         if event.key == "j":
@@ -233,40 +559,57 @@ class CheckableDirectoryTree(DirectoryTree): # (Keep as is from previous correct
         elif event.key == "k":
             if self.cursor_node is not None: self.action_cursor_up(); key_handled_by_us = True
         if key_handled_by_us: event.prevent_default()
+    def _collect_eligible_under(self, dir_path: Path, stat_cache: Optional[StatCache] = None) -> Set[Path]:
+        """Walk one selected directory (scan_tree: one scandir per directory,
+        pruned before descent) and return its packable files; the stat each
+        DirEntry already carries feeds the size check (and the shared per-run
+        StatCache) so nothing re-stats. Safe to run from a worker thread
+        (caches use atomic dict ops only)."""
+        excluded = self._deselected_under.get(dir_path)
+        excluded_strs = {str(p) for p in excluded} if excluded else None
+        on_error = lambda current, e: self.app.log(f"OS Error scanning {current}: {e}")
+        eligible: Set[Path] = set()
+        for path_str, st in scan_tree(dir_path, self._is_path_ignored, excluded_strs, on_error):
+            if st is not None and stat_cache is not None: stat_cache.put(path_str, st)
+            if self._file_passes_content_checks(Path(path_str), stat_result=st): eligible.add(Path(path_str))
+        return eligible
     def get_selected_final_files(self) -> List[Path]:
-        collected_files: Set[Path] = set(); already_processed_for_collection: Set[Path] = set() 
-        for path_obj_abs in self.selected_paths: 
-            if path_obj_abs.is_file() and path_obj_abs not in already_processed_for_collection:
-                if not self._is_path_ignored(path_obj_abs):
-                    is_bin = self._binary_heuristic_cache.get(path_obj_abs)
-                    if is_bin is None: is_bin = is_binary_heuristic(path_obj_abs); self._binary_heuristic_cache[path_obj_abs] = is_bin
-                    size_mb = self._file_size_cache.get(path_obj_abs)
-                    if size_mb is None: size_mb = get_file_size_mb(path_obj_abs); self._file_size_cache[path_obj_abs] = size_mb
-                    if not is_bin and size_mb <= MAX_FILE_SIZE_MB: collected_files.add(path_obj_abs)
-                already_processed_for_collection.add(path_obj_abs)
-        for selected_path_abs in self.selected_paths:
-            if selected_path_abs.is_dir():
-                if not self._is_path_ignored(selected_path_abs): 
-                    try:
-                        for item_abs in selected_path_abs.rglob("*"): 
-                            if item_abs.is_file() and item_abs not in already_processed_for_collection:
-                                if not self._is_path_ignored(item_abs): 
-                                    is_bin = self._binary_heuristic_cache.get(item_abs)
-                                    if is_bin is None: is_bin = is_binary_heuristic(item_abs); self._binary_heuristic_cache[item_abs] = is_bin
-                                    size_mb = self._file_size_cache.get(item_abs)
-                                    if size_mb is None: size_mb = get_file_size_mb(item_abs); self._file_size_cache[item_abs] = size_mb
-                                    if not is_bin and size_mb <= MAX_FILE_SIZE_MB: collected_files.add(item_abs)
-                                already_processed_for_collection.add(item_abs)
-                    except OSError as e: self.app.log(f"OS Error rglobbing {selected_path_abs}: {e}")
-                already_processed_for_collection.add(selected_path_abs) 
-        relative_collected_files = set()
+        collected_files: Set[Path] = set()
+        dir_roots: List[Path] = []
+        # One stat per path for the whole run: the walk seeds it from its
+        # DirEntry stats and every later probe is a dict hit.
+        stat_cache = StatCache()
+        for path_obj_abs in self.selected_paths:
+            if self._is_path_ignored(path_obj_abs): continue
+            try: root_stat = stat_cache.stat(str(path_obj_abs))  # one stat, not is_file()+is_dir()
+            except OSError: continue
+            if stat_module.S_ISREG(root_stat.st_mode):
+                if self._file_passes_content_checks(path_obj_abs, stat_result=root_stat): collected_files.add(path_obj_abs)
+            elif stat_module.S_ISDIR(root_stat.st_mode): dir_roots.append(path_obj_abs)
+        if len(dir_roots) == 1: collected_files.update(self._collect_eligible_under(dir_roots[0], stat_cache))
+        elif dir_roots:
+            # Fan out one walk per selected top-level directory; results merge
+            # into a single set so overlapping selections stay deduplicated.
+            collect = functools.partial(self._collect_eligible_under, stat_cache=stat_cache)
+            with ThreadPoolExecutor(max_workers=min(len(dir_roots), os.cpu_count() or 4)) as pool:
+                for subtree_files in pool.map(collect, dir_roots):
+                    collected_files.update(subtree_files)
+        # Single pass over the (already deduplicated) set, sorted exactly
+        # once at the end; the old pre-sort of the absolute paths only fed
+        # an intermediate set that was sorted again anyway.
+        relative_collected_files: List[Path] = []
         if self.project_root:
-            for abs_file_path in sorted(list(collected_files)):
-                try:
-                    if abs_file_path.is_relative_to(self.project_root):
-                         relative_collected_files.add(abs_file_path.relative_to(self.project_root))
-                except ValueError: self.app.log(f"ValueError making {abs_file_path} relative to {self.project_root}")
-        return sorted(list(relative_collected_files))
+            root_prefix_len = len(self._root_str)
+            outside_root = 0
+            for abs_file_path in collected_files:
+                abs_str = str(abs_file_path)
+                if abs_str.startswith(self._root_str):
+                    relative_collected_files.append(Path(abs_str[root_prefix_len:]))
+                else: outside_root += 1
+            # One summary line instead of a formatted log call per stray file.
+            if outside_root: self.app.log(f"Skipped {outside_root} collected files outside {self.project_root}")
+        relative_collected_files.sort()
+        return relative_collected_files
 
 
 class PathInputScreen(ModalScreen[Optional[Path]]): # (Keep as is)
@@ -367,7 +710,7 @@ class RepoPackerApp(App[None]):
     #app_body { layout: horizontal; height: 1fr; }
     #tree_panel { width: 2fr; height: 100%; }
     #sidebar_panel { width: 1fr; height: 100%; border-left: wide $primary-lighten-2; padding: 0 1; }
-    #sidebar_panel Markdown { width: 100%; height: 100%; overflow-y: auto;}
+    #sidebar_panel Static { width: 100%; height: 100%; overflow-y: auto;}
     CheckableDirectoryTree { border: round $primary; width: 100%; height: 100%; margin: 1 0; }
     #tree_placeholder { padding: 1; color: $text-muted; width: 100%; height: 100%; content-align: center middle; }
     #status_bar { dock: bottom; width: 100%; height: 1; padding: 0 1; background: $primary-background; color: $text; }
@@ -376,6 +719,7 @@ class RepoPackerApp(App[None]):
         Binding("ctrl+q", "quit", "Quit", show=True, priority=True),
         Binding("f5", "open_folder", "Open Folder", show=False), 
         Binding("c", "generate_packed_file", "Copy Prompt", show=True),
+        Binding("ctrl+s", "save_packed_file", "Save Prompt", show=True),
         Binding("a", "select_all_tree", "Select All (Project)", show=True),
         Binding("d", "deselect_all_tree", "Deselect All (Project)", show=True),
         Binding("ctrl+a", "select_in_focused_folder", "Sel Content (Dir)", show=True),
@@ -386,12 +730,36 @@ class RepoPackerApp(App[None]):
     ]
     current_project_path: reactive[Optional[Path]] = reactive(None)
     status_message = reactive("Ready. F5 to Open, 'c' to Copy Prompt.")
+    # Force saves to disk (fdatasync) before the rename; off by default.
+    durable_save: bool = False
+    # Save as .txt.zst instead of .txt; needs the optional zstandard package.
+    # Source text compresses 4-8x, so far fewer bytes reach the disk.
+    compress_save: bool = False
 
     # MODIFIED: Accept initial_path from constructor
-    def __init__(self, initial_path_from_arg: Optional[Path] = None):
+    def __init__(self, initial_path: Optional[Path] = None):
         super().__init__()
-        self.arg_initial_path = initial_path_from_arg # Store the path passed from main
+        self.arg_initial_path = initial_path # Store the path passed from main
         self.recent_folders = load_recent_folders()
+        # Collected final-files list, reused by the sidebar, copy and save
+        # paths; None means dirty (selection or project changed) and the next
+        # consumer re-walks the tree.
+        self._final_files_cache: Optional[List[Path]] = None
+        # Resolved once per project load; the save action only joins them.
+        self._save_dir: Path = Path.home()
+        self._default_save_name: str = "packed.txt"
+        # Keeps the in-flight clipboard copy alive until its callback fires.
+        self._copy_task: Optional[asyncio.Task] = None
+        # Saves are queued to one persistent writer task (started on mount) so
+        # back-to-back saves never block an action and run in order.
+        self._write_q: Optional[asyncio.Queue] = None
+        self._writer_task: Optional[asyncio.Task] = None
+        # Fixed widgets, cached on mount; query_one walks the whole DOM.
+        self._status_bar: Optional[Static] = None
+        self._sidebar_panel: Optional[Static] = None
+        # Status text written on hot paths; flushed to the reactive at most
+        # once per frame so bursts of updates cost one refresh.
+        self._pending_status: Optional[str] = None
         self.log(f"Application data directory: {APP_DATA_DIR}")
         self.log(f"Recent folders file path: {RECENT_FOLDERS_FILE}")
         if self.arg_initial_path:
@@ -404,11 +772,16 @@ class RepoPackerApp(App[None]):
         with Horizontal(id="app_body"):
             with Vertical(id="tree_panel"): pass
             with ScrollableContainer(id="sidebar_panel"):
-                yield Markdown("### Selected Files\n\n_None selected_", id="selected_files_md")
+                yield Static("[b]Selected Files[/b]\n\n[i]None selected[/i]", id="selected_files_md")
         yield Static(self.status_message, id="status_bar"); yield Footer()
 
     # MODIFIED: Use self.arg_initial_path first, then os.getcwd()
     async def on_mount(self) -> None:
+        self._status_bar = self.query_one("#status_bar", Static)
+        self._sidebar_panel = self.query_one("#selected_files_md", Static)
+        self.set_interval(1 / 60, self._flush_status)
+        self._write_q = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._writer_loop())
         path_to_load: Optional[Path] = None
         source_of_path: str = ""
 
@@ -445,20 +818,26 @@ class RepoPackerApp(App[None]):
             if self.query(CheckableDirectoryTree): 
                 tree_list = self.query(CheckableDirectoryTree) 
                 if tree_list and tree_list.first().project_root: 
-                    tree_list.first().post_message(CheckableDirectoryTree.SelectionChanged(set(), tree_list.first().project_root)) 
-            else: self.query_one("#selected_files_md", Markdown).update("### Selected Files\n\n_None selected_")
+                    tree_list.first().post_message(CheckableDirectoryTree.SelectionChanged(frozenset(), tree_list.first().project_root)) 
+            else: self._sidebar_panel.update("[b]Selected Files[/b]\n\n[i]None selected[/i]")
         except Exception as e: self.log(f"Error in on_mount sidebar clearing: {e}")
 
 
     def watch_current_project_path(self, old_path: Optional[Path], new_path: Optional[Path]) -> None: # (Keep as is)
         try: self.query_one("#tree_panel").remove_children()
         except NoMatches: self.log("Error: #tree_panel not found during watch"); return
-        try: self.query_one("#selected_files_md", Markdown).update("### Selected Files\n\n_None selected_")
-        except NoMatches: pass
+        if self._sidebar_panel is not None: self._sidebar_panel.update("[b]Selected Files[/b]\n\n[i]None selected[/i]")
+        self._final_files_cache = None
         if new_path and new_path.is_dir():
             tree = CheckableDirectoryTree(str(new_path), id="dir_tree")
             self.query_one("#tree_panel").mount(tree); self.call_after_refresh(tree.focus)
-            save_recent_folders(new_path, self.recent_folders); self.recent_folders = load_recent_folders()
+            # Promote in memory with the same ordering the file uses; the disk
+            # write happens off the event loop and nothing is re-read after.
+            self._save_dir = new_path.parent if new_path.parent != new_path else Path.home()
+            self._default_save_name = f"{new_path.name}_packed.txt"
+            prior_recent = self.recent_folders
+            self.recent_folders = _promote_recent(new_path, prior_recent)
+            self.run_worker(asyncio.to_thread(save_recent_folders, new_path, prior_recent), exclusive=False)
             self.sub_title = str(new_path); self.status_message = f"Project: {new_path.name}. Select items. 'c' to Copy."
         else:
             self.query_one("#tree_panel").mount(Static("No project loaded. Open a folder (F5).", id="tree_placeholder"))
@@ -466,17 +845,21 @@ class RepoPackerApp(App[None]):
             if old_path and not new_path: self.notify("Folder selection cancelled or failed.", severity="warning")
     
     def watch_status_message(self, new_message: str) -> None: # (Keep as is)
-        try: self.query_one("#status_bar", Static).update(new_message)
-        except NoMatches: pass
+        if self._status_bar is not None: self._status_bar.update(new_message)
+
+    def _flush_status(self) -> None:
+        if self._pending_status is not None: self.status_message = self._pending_status; self._pending_status = None
     
     async def on_checkable_directory_tree_selection_changed(self, event: CheckableDirectoryTree.SelectionChanged) -> None: # (Keep as is)
+        self._final_files_cache = None
         try:
-            md_widget = self.query_one("#selected_files_md", Markdown)
-            tree = self.query_one(CheckableDirectoryTree) 
-            final_files = tree.get_selected_final_files() 
-            if not final_files: md_widget.update("### Selected Files\n\n_No packable files based on current selection._"); return
-            display_items = [f"- `{str(rel_path)}`" for rel_path in sorted(final_files)]
-            md_widget.update(f"### Selected Files ({len(display_items)})\n\n" + "\n".join(display_items))
+            md_widget = self._sidebar_panel
+            if md_widget is None: return
+            tree = self.query_one(CheckableDirectoryTree)
+            # Walks + binary sniffing hit the disk; keep them off the event loop.
+            final_files = await asyncio.to_thread(tree.get_selected_final_files)
+            self._final_files_cache = final_files
+            md_widget.update(_render_selected_files_md(tuple(str(rel_path) for rel_path in sorted(final_files))))
         except NoMatches: self.log("Error: Widget not found for sidebar update.")
         except Exception as e: self.log(f"Error updating sidebar: {e}")
     
@@ -490,8 +873,10 @@ class RepoPackerApp(App[None]):
         try:
             tree = self.query_one(CheckableDirectoryTree)
             if tree.project_root: tree._apply_selection_recursive(tree.project_root, select_state=True) 
-            tree.refresh(); tree.post_message(CheckableDirectoryTree.SelectionChanged(tree.selected_paths.copy(), tree.project_root))
-            self.status_message = f"{sum(1 for p in tree.selected_paths if not tree._is_path_ignored(p))} items marked."
+            tree.refresh(); tree.post_message(CheckableDirectoryTree.SelectionChanged(frozenset(tree.selected_paths), tree.project_root))
+            # Selection is stored as covering roots; counting files would mean
+            # walking the tree, which the sidebar update already does.
+            self.status_message = "Project marked for packing."
         except NoMatches: self.status_message = "No project tree loaded."; self.bell()
         except Exception as e: self.status_message = f"Error selecting all: {e}"; self.log(f"Select All Error: {e}"); self.bell()
     
@@ -499,8 +884,8 @@ class RepoPackerApp(App[None]):
         try:
             tree = self.query_one(CheckableDirectoryTree)
             if tree.project_root: tree._apply_selection_recursive(tree.project_root, select_state=False)
-            else: tree.selected_paths.clear() 
-            tree.refresh(); tree.post_message(CheckableDirectoryTree.SelectionChanged(tree.selected_paths.copy(), tree.project_root))
+            else: tree.selected_paths.clear(); tree._deselected_under.clear(); tree._selected_cache.clear()
+            tree.refresh(); tree.post_message(CheckableDirectoryTree.SelectionChanged(frozenset(tree.selected_paths), tree.project_root))
             self.status_message = "All selections cleared."
         except NoMatches: self.status_message = "No project tree loaded."; self.bell()
     
@@ -512,7 +897,7 @@ class RepoPackerApp(App[None]):
                 if node_path.is_dir(): 
                     for child_item in tree.filter_paths(node_path.iterdir()):
                         tree._apply_selection_recursive(child_item, select_state)
-                    tree.refresh(); tree.post_message(CheckableDirectoryTree.SelectionChanged(tree.selected_paths.copy(), tree.project_root))
+                    tree.refresh(); tree.post_message(CheckableDirectoryTree.SelectionChanged(frozenset(tree.selected_paths), tree.project_root))
                     self.status_message = f"{'Selected' if select_state else 'Deselected'} contents of '{node_path.name}'."
                 else: self.status_message = "Focused item is not a directory."; self.bell() 
             else: self.status_message = "No item focused."; self.bell()
@@ -521,61 +906,192 @@ class RepoPackerApp(App[None]):
     def action_select_in_focused_folder(self) -> None: self._operate_on_focused_folder_contents(select_state=True)
     def action_deselect_in_focused_folder(self) -> None: self._operate_on_focused_folder_contents(select_state=False)
     
+    def _get_final_files(self) -> List[Path]:
+        """Return the eligible selected files, re-walking the tree only when
+        the selection changed since the last walk."""
+        if self._final_files_cache is None:
+            self._final_files_cache = self.query_one(CheckableDirectoryTree).get_selected_final_files()
+        return self._final_files_cache
+
+    def _pack_header_parts(self, selected_paths: List[Path]) -> List[str]:
+        header_parts = [_SUMMARY_HEADER.format(project=self.current_project_path.name)]
+        for rel_path in selected_paths: header_parts.append(rel_path.as_posix())
+        header_parts.extend(["</directory_structure>", "", "<files>", "This section contains the contents of the repository's selected files."])
+        return header_parts
+
+    def _write_pack_file(self, save_path: Path, selected_paths: List[Path]) -> int:
+        """Stream the pack through a 1 MiB buffered binary writer into a temp
+        file next to the target, then atomically rename it into place. Chunks
+        are encoded as they are produced, so only one file's contents is
+        resident at a time and the kernel sees coalesced 1 MiB writes."""
+        files_written = 0
+        # Reads run in a small thread pool a bounded window ahead of the
+        # writer: read() releases the GIL, so the disk works on the next
+        # files while the current one is normalized and written. Submit
+        # order is consumption order, keeping the output deterministic, and
+        # the window caps how many file contents are resident at once.
+        _PREFETCH = 32
+
+        def _iter_encoded_chunks(pool: ThreadPoolExecutor):
+            nonlocal files_written
+            next_status = 64
+            futures = {i: pool.submit(_read_for_pack, self.current_project_path / rp)
+                       for i, rp in enumerate(selected_paths[:_PREFETCH])}
+            yield "\n".join(self._pack_header_parts(selected_paths)).encode("utf-8")
+            if selected_paths: yield b"\n"
+            for i, rel_path in enumerate(selected_paths):
+                full_path = self.current_project_path / rel_path
+                rel_path_posix = rel_path.as_posix()
+                if i + _PREFETCH < len(selected_paths):
+                    nxt = i + _PREFETCH
+                    futures[nxt] = pool.submit(_read_for_pack, self.current_project_path / selected_paths[nxt])
+                try:
+                    # Keep file contents as buffers end to end: bytes (or an
+                    # mmap for large files), the same newline normalization
+                    # read_text would apply, then a validation-only decode.
+                    # Valid UTF-8 (the common case) skips the re-encode pass
+                    # and the template copy of the whole content that the str
+                    # route paid per file; a clean mmap goes to the writer
+                    # without ever becoming a Python bytes object.
+                    raw = futures.pop(i).result()
+                    if raw.find(b"\r") != -1:
+                        data = bytes(raw)
+                        if isinstance(raw, mmap.mmap): raw.close()
+                        raw = data.replace(b"\r\n", b"\n").replace(b"\r", b"\n")
+                    try: str(raw, "utf-8")  # validation only; accepts any buffer
+                    except UnicodeDecodeError:
+                        data = bytes(raw)
+                        if isinstance(raw, mmap.mmap): raw.close()
+                        raw = data.decode("utf-8", errors="replace").encode("utf-8")
+                    yield f'\n<file path="{rel_path_posix}">'.encode("utf-8"); yield raw
+                    if isinstance(raw, mmap.mmap): raw.close()  # written by the time the writer pulls again
+                    yield b"</file>"
+                    files_written += 1
+                    # Progress every 64 files, not per file: the assignment is
+                    # an atomic attribute write picked up by the once-per-frame
+                    # status flush, so a large pack wakes the UI dozens of
+                    # times instead of thousands.
+                    if files_written >= next_status:
+                        self._pending_status = f"Saving... {files_written}/{len(selected_paths)} files"
+                        next_status = files_written + 64
+                except Exception as e:
+                    self.log(f"Error reading {full_path}: {e}")
+                    yield _FILE_TEMPLATE.format(p=rel_path_posix, c=f"{os.linesep}Error reading file: {e}{os.linesep}").encode("utf-8")
+                if i < len(selected_paths) -1: yield b"\n"
+            yield b"\n</files>"
+
+        tmp_fd, tmp_name = tempfile.mkstemp(dir=str(save_path.parent), prefix=f".{save_path.name}.", suffix=".tmp")
+        try:
+            with open(tmp_fd, "wb", buffering=1 << 20) as f, \
+                 ThreadPoolExecutor(max_workers=min(_PREFETCH, (os.cpu_count() or 4) * 4)) as pool:
+                if self.compress_save and zstandard is not None:
+                    # Level 3 compresses faster than the disk writes, so the
+                    # save is gated on the (much smaller) compressed bytes.
+                    with zstandard.ZstdCompressor(level=3, threads=-1).stream_writer(f, closefd=False) as writer:
+                        for chunk in _iter_encoded_chunks(pool): writer.write(chunk)
+                else:
+                    f.writelines(_iter_encoded_chunks(pool))
+                # A crash before the data reaches disk just means re-running
+                # the pack, so forced flushes are opt-in.
+                if self.durable_save: f.flush(); _fsync(f.fileno())
+            os.replace(tmp_name, save_path)
+        except Exception:
+            try: os.unlink(tmp_name)
+            except OSError: pass
+            raise
+        return files_written
+
+    def action_save_packed_file(self) -> None:
+        if not self.current_project_path: self.notify("Error: No project folder loaded.", severity="error", timeout=3); self.bell(); return
+        try: selected_paths = self._get_final_files()
+        except NoMatches: self.notify("Error: Project tree not found.", severity="error", timeout=3); self.bell(); return
+        if not selected_paths: self.notify("Warning: No files selected/eligible.", severity="warning", timeout=3); self.bell(); return
+        save_name = self._default_save_name
+        if self.compress_save and zstandard is not None: save_name += ".zst"
+        save_path = self._save_dir / save_name
+        # Queue the save and return; the writer loop overlaps the disk work
+        # with whatever the user does next, and the atomic rename means a
+        # half-written save is never visible at the target path.
+        self._pending_status = "Saving packed file..."
+        self._write_q.put_nowait((save_path, selected_paths))
+
+    async def _writer_loop(self) -> None:
+        """Drain queued saves one at a time in a worker thread for the app's
+        lifetime; producers only enqueue and never block."""
+        while True:
+            save_path, selected_paths = await self._write_q.get()
+            try:
+                files_written = await asyncio.to_thread(self._write_pack_file, save_path, selected_paths)
+                self.notify(f"{files_written} files packed to {save_path.name}!", severity="information", timeout=4); self._pending_status = f"Saved: {save_path}"
+            except Exception as e:
+                self.log(f"Save error: {e}"); self.notify("Error saving packed file.", severity="error", timeout=5); self._pending_status = "Error saving."
+            finally: self._write_q.task_done()
+
     async def action_generate_packed_file(self) -> None: # (Keep as is)
         if not self.current_project_path: self.notify("Error: No project folder loaded.", severity="error", timeout=3); self.bell(); return
-        try: tree = self.query_one(CheckableDirectoryTree); selected_paths = tree.get_selected_final_files() 
+        try: selected_paths = self._get_final_files()
         except NoMatches: self.notify("Error: Project tree not found.", severity="error", timeout=3); self.bell(); return
         if not selected_paths: self.notify("Warning: No files selected/eligible.", severity="warning", timeout=3); self.bell(); return
-        output_parts = ["<file_summary>", "This section contains a summary of this file.", "", "<purpose>", "This file contains a packed representation of selected repository contents.", "It is designed to be easily consumable by AI systems for analysis, code review,","or other automated processes.","</purpose>","","<file_format>", "The content is organized as follows:","1. This summary section","2. Directory structure of selected files","3. Selected repository files, each consisting of:","  - File path as an attribute (relative to project root)","  - Full contents of the file","</file_format>","","<usage_guidelines>","- This file should be treated as read-only. Any changes should be made to the","  original repository files, not this packed version.","- When processing this file, use the file path to distinguish","  between different files in the repository.","- Be aware that this file may contain sensitive information. Handle it with","  the same level of security as you would the original repository.","</usage_guidelines>","","<notes>","- Files are selected based on user interaction and ignore rules.","- Binary files (based on a heuristic) are excluded.","- Files matching patterns in .gitignore (if present) and default ignore patterns (e.g., .git, __pycache__) are typically excluded from selection and packing.",f"- File size limits may apply (currently >{MAX_FILE_SIZE_MB}MB excluded).","</notes>","","<additional_info>",f"Generated by RepoPacker TUI from project: {self.current_project_path.name}","</additional_info>","</file_summary>","","<directory_structure>"]
-        for rel_path in selected_paths: output_parts.append(str(rel_path).replace('\\', '/')) 
-        output_parts.extend(["</directory_structure>", "", "<files>", "This section contains the contents of the repository's selected files."])
-        if selected_paths: output_parts.append("")
-        files_processed = 0; self.status_message = "Preparing content..."; await asyncio.sleep(0.01) 
+        # Accumulate rendered chunks; the clipboard helper consumes the list
+        # directly, encoding and streaming chunk by chunk.
+        chunks: List[str] = ["\n".join(self._pack_header_parts(selected_paths))]
+        if selected_paths: chunks.append("\n")
+        files_processed = 0; self._pending_status = "Preparing content..."
+        # Read files concurrently off the event loop; the semaphore caps open
+        # fds and gather preserves selection order for the output.
+        read_sem = asyncio.Semaphore(8)
+        async def _read_one(full_path: Path) -> Tuple[Optional[str], Optional[Exception]]:
+            async with read_sem:
+                try: return await asyncio.to_thread(full_path.read_text, encoding='utf-8', errors='replace'), None
+                except Exception as e: return None, e
+        results = await asyncio.gather(*(_read_one(self.current_project_path / rp) for rp in selected_paths))
         for i, rel_path in enumerate(selected_paths):
-            full_path = self.current_project_path / rel_path
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='replace') as f: content = f.read()
-                output_parts.extend([f'<file path="{str(rel_path).replace("\\", "/")}">{content}</file>'])
-                if i < len(selected_paths) -1: output_parts.append("")
+            rel_path_posix = rel_path.as_posix()
+            content, read_error = results[i]
+            if read_error is None:
+                chunks.append(_FILE_TEMPLATE.format(p=rel_path_posix, c=content))
                 files_processed += 1
-            except Exception as e:
-                self.log(f"Error reading {full_path}: {e}")
-                output_parts.extend([f'<file path="{str(rel_path).replace("\\", "/")}">{os.linesep}Error reading file: {e}{os.linesep}</file>'])
-                if i < len(selected_paths) -1: output_parts.append("")
-        output_parts.append("</files>")
-        final_output = "\n".join(output_parts)
-        try: pyperclip.copy(final_output); self.notify(f"{files_processed} files packed & copied!", severity="information", timeout=4); self.status_message = "Prompt copied."
-        except pyperclip.PyperclipException as e: self.log(f"Clipboard error: {e}"); self.notify("Clipboard error.", severity="error", timeout=5); self.status_message = "Clipboard error."
-        except Exception as e: self.log(f"Pack error: {e}"); self.notify("Unexpected error.", severity="error", timeout=5); self.status_message = "Error packing."
+            else:
+                self.log(f"Error reading {self.current_project_path / rel_path}: {read_error}")
+                chunks.append(_FILE_TEMPLATE.format(p=rel_path_posix, c=f"{os.linesep}Error reading file: {read_error}{os.linesep}"))
+            if i < len(selected_paths) -1: chunks.append("\n")
+        chunks.append("\n</files>")
+        def _on_copy_done(task: asyncio.Task) -> None:
+            e = task.exception()
+            if e is None: self.notify(f"{files_processed} files packed & copied!", severity="information", timeout=4); self._pending_status = "Prompt copied."
+            elif pyperclip is not None and isinstance(e, pyperclip.PyperclipException): self.log(f"Clipboard error: {e}"); self.notify("Clipboard error.", severity="error", timeout=5); self._pending_status = "Clipboard error."
+            else: self.log(f"Pack error: {e}"); self.notify("Unexpected error.", severity="error", timeout=5); self._pending_status = "Error packing."
+        # Hand the copy to a worker thread and return control to the user
+        # immediately; the done callback runs back on the event loop. The
+        # chunk list goes over as-is -- the clipboard helper streams it, so
+        # no full-document string is built on the native paths.
+        self._pending_status = "Copying to clipboard..."
+        self._copy_task = asyncio.create_task(asyncio.to_thread(_copy_to_clipboard, chunks))
+        self._copy_task.add_done_callback(_on_copy_done)
 
 
 # MODIFIED: Logic to determine initial_path_for_app
 if __name__ == "__main__":
     initial_path_for_app: Optional[Path] = None
-    
-    # Check for command-line argument first
+
+    # Check for command-line argument first. One os.stat answers both
+    # "exists" and "is a directory"; abspath then normalizes "." (as passed
+    # by Neovim) and relative paths without further syscalls.
     if len(sys.argv) > 1:
         path_arg_str = sys.argv[1]
-        # If Neovim passes ".", resolve it to an absolute path based on CWD
-        if path_arg_str == ".":
-            try:
-                path_arg = Path(os.getcwd()).resolve()
-            except Exception as e:
-                print(f"Warning: Could not resolve '.' to current working directory: {e}")
-                path_arg = None # Fallback or handle error
+        try:
+            arg_stat = os.stat(path_arg_str)
+        except OSError as e:
+            print(f"Warning: Cannot access path argument '{path_arg_str}': {e}. Will try CWD or prompt.")
         else:
-            path_arg = Path(path_arg_str)
-        
-        if path_arg and path_arg.is_dir():
-            initial_path_for_app = path_arg.resolve()
-            print(f"Using initial path from command line argument: {initial_path_for_app}")
-        elif path_arg:
-            print(f"Warning: Provided path argument '{path_arg}' is not a valid directory. Will try CWD or prompt.")
-        else: # path_arg was None from "." resolution failure
-            print(f"Warning: Could not use '.' as initial path. Will try CWD or prompt.")
+            if stat_module.S_ISDIR(arg_stat.st_mode):
+                initial_path_for_app = Path(os.path.abspath(path_arg_str))
+                print(f"Using initial path from command line argument: {initial_path_for_app}")
+            else:
+                print(f"Warning: Provided path argument '{path_arg_str}' is not a valid directory. Will try CWD or prompt.")
 
     # If no valid path from argument, initial_path_for_app is still None
     # The RepoPackerApp.on_mount() method will then try os.getcwd()
-    
-    app = RepoPackerApp(initial_path_from_arg=initial_path_for_app)
+
+    app = RepoPackerApp(initial_path=initial_path_for_app)
     app.run()
@@ -1,10 +1,12 @@
 # repopacker/cli.py
 
+import os
+import stat
 import sys
 from pathlib import Path
 # We assume repoyank.py will be moved to repopacker/app.py
 # and the RepoPackerApp class is defined there.
-from .app import RepoPackerApp 
+from .app import RepoPackerApp
 
 def main() -> None:
     initial_folder: Path | None = None
@@ -19,9 +21,14 @@ def main() -> None:
             print("\nInteractive TUI for selecting and packing repository files into an AI-friendly prompt.")
             sys.exit(0)
 
-        path_arg = Path(path_arg_str)
-        if path_arg.is_dir():
-            initial_folder = path_arg.resolve()
+        # One os.stat covers existence + directory-ness; abspath normalizes
+        # without the stat chain Path.resolve() would re-run per component.
+        try:
+            arg_stat = os.stat(path_arg_str)
+        except OSError:
+            arg_stat = None
+        if arg_stat is not None and stat.S_ISDIR(arg_stat.st_mode):
+            initial_folder = Path(os.path.abspath(path_arg_str))
         else:
             print(f"Warning: Provided path '{path_arg_str}' is not a valid directory. Starting without initial project.")
             # Optionally, exit here or let the app open its folder selection dialog
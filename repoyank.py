@@ -9,6 +9,9 @@ import os
 from pathlib import Path
 from typing import Set, List, Optional, Iterable
 import fnmatch
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 from textual.app import App, ComposeResult
@@ -19,6 +22,7 @@ from textual.widgets._tree import TreeNode
 from textual.widgets._directory_tree import DirEntry
 from textual.binding import Binding
 from textual.message import Message
+from textual.timer import Timer
 from textual import events
 from textual.style import Style
 from rich.text import Text
@@ -46,15 +50,76 @@ DEFAULT_IGNORES = [
     ".coverage", ".hypothesis/", "htmlcov/", ".nox/",
 ]
 MAX_FILE_SIZE_MB = 10
+_MAX_FILE_SIZE_BYTES = MAX_FILE_SIZE_MB * 1024 * 1024
+
+def _combined_glob_re(patterns: List[str]) -> Optional[re.Pattern]:
+    """Union a list of globs into one compiled regex so a name is tested with
+    a single match call instead of one regex invocation per pattern."""
+    if not patterns:
+        return None
+    return re.compile('|'.join('(?:%s)' % fnmatch.translate(p) for p in patterns))
+
+def _split_ignore_patterns(patterns: List[str]) -> tuple:
+    """Split glob patterns into structures that match with single C-level
+    operations: literal directory names (set intersection against the path's
+    parts), plain '*.ext' patterns (one tuple-endswith on the name), and the
+    residual globs that still need regex matching."""
+    dir_names = set()
+    suffixes = []
+    globs = []
+    for pattern in patterns:
+        is_dir = pattern.endswith('/')
+        pattern = pattern.rstrip('/')
+        has_glob_chars = any(ch in pattern for ch in '*?[')
+        if is_dir and not has_glob_chars:
+            dir_names.add(pattern)
+        elif pattern.startswith('*.') and not any(ch in pattern[1:] for ch in '*?['):
+            suffixes.append(pattern[1:])
+        else:
+            globs.append(pattern)
+    return frozenset(dir_names), tuple(suffixes), globs
+
+_IGNORE_DIR_NAMES, _IGNORE_EXT_SUFFIXES, _IGNORE_GLOBS = _split_ignore_patterns(DEFAULT_IGNORES)
+_IGNORE_COMBINED_RE = _combined_glob_re(_IGNORE_GLOBS)
 
 # --- Helper Functions ---
-def is_binary_heuristic(filepath: Path, sample_size=1024) -> bool:
+# Extensions that are always treated as text; membership in a frozenset is
+# far cheaper than opening the file for the NUL sniff.
+_TEXT_EXTS = frozenset({
+    ".py", ".pyi", ".txt", ".md", ".rst", ".js", ".jsx", ".ts", ".tsx", ".json",
+    ".yaml", ".yml", ".toml", ".ini", ".cfg", ".html", ".htm", ".css", ".scss",
+    ".xml", ".csv", ".sh", ".bash", ".zsh", ".c", ".h", ".cpp", ".hpp", ".cc",
+    ".rs", ".go", ".java", ".kt", ".rb", ".php", ".pl", ".lua", ".sql", ".vim",
+})
+
+# Sniff results keyed by (path, mtime_ns, size); the sidebar and render paths
+# re-ask about the same files constantly, and a hit avoids re-opening them.
+_binary_cache: dict = {}
+_BINARY_CACHE_MAX = 50000
+
+def is_binary_heuristic(filepath: Path, sample_size=1024, stat_result=None) -> bool:
+    if filepath.suffix.lower() in _TEXT_EXTS:
+        return False
+    try:
+        st = stat_result if stat_result is not None else filepath.stat()
+    except OSError:
+        return True
+    key = (str(filepath), st.st_mtime_ns, st.st_size)
+    cached = _binary_cache.get(key)
+    if cached is not None:
+        return cached
     try:
         with open(filepath, 'rb') as f:
             sample = f.read(sample_size)
-        return b'\0' in sample
+        # find with an int needle goes straight to memchr in C.
+        result = sample.find(0) != -1
     except Exception:
-        return True
+        result = True
+    if len(_binary_cache) >= _BINARY_CACHE_MAX:
+        # Simple FIFO eviction keeps the cache bounded on huge trees.
+        del _binary_cache[next(iter(_binary_cache))]
+    _binary_cache[key] = result
+    return result
 
 def get_file_size_mb(filepath: Path) -> float:
     try:
@@ -89,17 +154,51 @@ class VimDirectoryTree(DirectoryTree):
     ]
 
     class SelectionChanged(Message):
-        def __init__(self, selected_paths: Set[Path], project_root: Path) -> None:
+        def __init__(self, selected_paths: Set[str], project_root: Path) -> None:
             super().__init__()
             self.selected_paths = selected_paths
             self.project_root = project_root
 
     def __init__(self, path: str, id: Optional[str] = None, ignored_patterns: Optional[List[str]] = None):
         super().__init__(path, id=id)
-        self.selected_paths: Set[Path] = set()
+        # Selections are stored as absolute path strings: membership tests run
+        # in render_label for every visible row, and hashing a str is cheaper
+        # than Path.__hash__ (which stringifies first). Paths are rebuilt only
+        # at the API boundary in get_selected_files.
+        self.selected_paths: Set[str] = set()
         self.project_root = Path(path).resolve()
+        # Containment is checked by string prefix; resolving or calling
+        # is_relative_to per path would cost a syscall / exception dance.
+        self._project_root_str = str(self.project_root)
+        self._project_root_prefix = self._project_root_str + os.sep
         self._gitignore_matchers: dict[Path, Optional[callable]] = {}
+        # Applicable-matcher chains keyed by a file's parent directory, so the
+        # ancestor walk happens at most once per directory.
+        self._gitignore_chain_cache: dict[Path, List[callable]] = {}
+        # Directories that actually contain a .gitignore, located by one lazy
+        # walk; None until first needed.
+        self._gitignore_dirs: Optional[Set[str]] = None
         self.additional_ignored_patterns = ignored_patterns or []
+        self._additional_dir_names = frozenset(
+            p.rstrip('/') for p in self.additional_ignored_patterns if p.endswith('/')
+        )
+        self._additional_re = _combined_glob_re(
+            [p for p in self.additional_ignored_patterns if not p.endswith('/')]
+        )
+        # Ignore verdicts per resolved path. render_label, filter_paths and
+        # the recursive walks all re-ask about the same paths, so repeat
+        # lookups become a dict hit instead of a full pattern scan.
+        self._ignore_cache: dict[Path, bool] = {}
+
+    _IGNORE_CACHE_MAX = 20000
+
+    def reload(self):
+        """Reload the tree, dropping caches tied to on-disk state."""
+        self._ignore_cache.clear()
+        self._gitignore_matchers.clear()
+        self._gitignore_chain_cache.clear()
+        self._gitignore_dirs = None
+        return super().reload()
 
     def filter_paths(self, paths: Iterable[Path]) -> Iterable[Path]:
         for path_obj in paths:
@@ -107,49 +206,118 @@ class VimDirectoryTree(DirectoryTree):
                 yield path_obj
 
     def _is_path_ignored(self, path_obj: Path) -> bool:
-        abs_path_obj = path_obj.resolve() if not path_obj.is_absolute() else path_obj
-        try:
-            if not abs_path_obj.is_relative_to(self.project_root) and abs_path_obj != self.project_root:
-                return True
-        except ValueError:
+        # The tree hands us absolute paths already; only normalize the odd
+        # relative one, and without the realpath syscall resolve() makes.
+        abs_path_obj = path_obj if path_obj.is_absolute() else Path(os.path.abspath(path_obj))
+        cached = self._ignore_cache.get(abs_path_obj)
+        if cached is not None:
+            return cached
+        result = self._compute_path_ignored(abs_path_obj)
+        if len(self._ignore_cache) >= self._IGNORE_CACHE_MAX:
+            # Simple FIFO eviction keeps the cache bounded on huge trees.
+            del self._ignore_cache[next(iter(self._ignore_cache))]
+        self._ignore_cache[abs_path_obj] = result
+        return result
+
+    def _compute_path_ignored(self, abs_path_obj: Path) -> bool:
+        path_str = str(abs_path_obj)
+        if path_str != self._project_root_str and not path_str.startswith(self._project_root_prefix):
             return True
 
-        current_ignore_patterns = DEFAULT_IGNORES + self.additional_ignored_patterns
-        for pattern_str in current_ignore_patterns:
-            if pattern_str.endswith('/'):
-                dir_name_to_ignore = pattern_str.rstrip('/')
-                if dir_name_to_ignore in abs_path_obj.parts or \
-                   (abs_path_obj.is_dir() and abs_path_obj.name == dir_name_to_ignore):
-                    return True
-            elif fnmatch.fnmatch(abs_path_obj.name, pattern_str):
-                return True
+        # One frozenset per path; both dir-name tests become a C-level set AND
+        # instead of re-hashing the parts tuple per pattern collection.
+        parts_set = frozenset(abs_path_obj.parts)
+        if _IGNORE_DIR_NAMES & parts_set:
+            return True
+        name = abs_path_obj.name
+        if name.endswith(_IGNORE_EXT_SUFFIXES):
+            return True
+        if _IGNORE_COMBINED_RE.match(name) is not None:
+            return True
+        if self._additional_dir_names and (self._additional_dir_names & parts_set):
+            return True
+        if self._additional_re is not None and self._additional_re.match(name) is not None:
+            return True
 
         # Check gitignore
         path_to_check_str = str(abs_path_obj)
-        dirs_to_check = [self.project_root]
-        if abs_path_obj.parent != self.project_root and abs_path_obj.parent.is_relative_to(self.project_root):
-            current_dir = abs_path_obj.parent
-            while current_dir != self.project_root and current_dir != current_dir.parent:
+        for matcher in self._gitignore_chain_for(abs_path_obj.parent):
+            if matcher(path_to_check_str):
+                return True
+        return False
+
+    def _gitignore_chain_for(self, parent_dir: Path) -> List[callable]:
+        """Return the gitignore matchers that apply to entries of parent_dir,
+        in root-to-leaf order. The ancestor walk and the per-directory parse
+        both happen at most once; repeat calls are a single dict hit."""
+        chain = self._gitignore_chain_cache.get(parent_dir)
+        if chain is not None:
+            return chain
+
+        gitignore_dirs = self._locate_gitignore_dirs()
+        if not gitignore_dirs:
+            # Projects without any .gitignore skip the ancestor walk entirely.
+            self._gitignore_chain_cache[parent_dir] = []
+            return self._gitignore_chain_cache[parent_dir]
+
+        dirs_to_check: List[Path] = []
+        current_dir = parent_dir
+        while True:
+            current_str = str(current_dir)
+            if current_str == self._project_root_str:
                 dirs_to_check.append(current_dir)
-                if not current_dir.is_relative_to(self.project_root):
-                    break
-                current_dir = current_dir.parent
+                break
+            if not current_str.startswith(self._project_root_prefix) or current_dir == current_dir.parent:
+                break
+            dirs_to_check.append(current_dir)
+            current_dir = current_dir.parent
 
+        chain = []
         for gitignore_dir in reversed(dirs_to_check):
-            matcher = self._gitignore_matchers.get(gitignore_dir)
-            if matcher is None:
-                gf_path = gitignore_dir / ".gitignore"
-                if gf_path.is_file():
-                    try:
-                        matcher = gitignore_parser.parse_gitignore(str(gf_path), base_dir=str(gitignore_dir))
-                    except Exception:
-                        matcher = lambda p: False
-                else:
-                    matcher = lambda p: False
+            if str(gitignore_dir) not in gitignore_dirs:
+                continue  # known not to hold a .gitignore; no is_file syscall
+            if gitignore_dir not in self._gitignore_matchers:
+                try:
+                    matcher = gitignore_parser.parse_gitignore(str(gitignore_dir / ".gitignore"), base_dir=str(gitignore_dir))
+                except Exception:
+                    matcher = None
                 self._gitignore_matchers[gitignore_dir] = matcher
-            if callable(matcher) and matcher(path_to_check_str):
-                return True
-        return False
+            matcher = self._gitignore_matchers[gitignore_dir]
+            if matcher is not None:
+                chain.append(matcher)
+        self._gitignore_chain_cache[parent_dir] = chain
+        return chain
+
+    def _locate_gitignore_dirs(self) -> Set[str]:
+        """One lazy walk over the project recording every directory that has
+        a .gitignore; ignored directory names are pruned before descent. The
+        set is dropped on reload."""
+        if self._gitignore_dirs is None:
+            found: Set[str] = set()
+            try:
+                for dirpath, dirnames, filenames in os.walk(self.project_root, followlinks=False):
+                    dirnames[:] = [d for d in dirnames if d not in _IGNORE_DIR_NAMES]
+                    if ".gitignore" in filenames:
+                        found.add(dirpath)
+            except OSError:
+                pass
+            self._gitignore_dirs = found
+        return self._gitignore_dirs
+
+    def _entry_packable(self, entry: os.DirEntry, entry_path: Path) -> bool:
+        """Fused eligibility pass over one directory entry: ignore rules
+        first (cached), then the size limit from the DirEntry's cached stat
+        (no extra syscall), and only for small-enough files the 1 KiB binary
+        sniff that actually opens the file."""
+        if self._is_path_ignored(entry_path):
+            return False
+        try:
+            st = entry.stat()
+        except OSError:
+            return False
+        if st.st_size > _MAX_FILE_SIZE_BYTES:
+            return False
+        return not is_binary_heuristic(entry_path, stat_result=st)
 
     def _is_file_packable(self, file_path: Path) -> bool:
         """Check if a file should be included in packing"""
@@ -157,12 +325,12 @@ class VimDirectoryTree(DirectoryTree):
             return False
         if is_binary_heuristic(file_path) or get_file_size_mb(file_path) > MAX_FILE_SIZE_MB:
             return False
-        if file_path in self.selected_paths:
+        if str(file_path) in self.selected_paths:
             return True
         # Check if any parent is selected
         current_parent = file_path.parent
         while current_parent != self.project_root.parent:
-            if current_parent in self.selected_paths:
+            if str(current_parent) in self.selected_paths:
                 return True
             if current_parent == self.project_root:
                 break
@@ -171,11 +339,18 @@ class VimDirectoryTree(DirectoryTree):
 
     def render_label(self, node: TreeNode[DirEntry], base_style: Style, style: Style) -> Text:
         rendered_label = super().render_label(node, base_style, style)
-        if node.data is None:
+        data = node.data
+        if data is None:
             return Text("Error: No data")
 
-        node_path = Path(node.data.path)
-        is_selected = node_path in self.selected_paths
+        # data.path is stable for a node's lifetime, so parse it once and pin
+        # both the Path and its string form on the DirEntry; later renders of
+        # the same row skip the Path construction and the str() call.
+        node_path = getattr(data, "_cached_path", None)
+        if node_path is None:
+            node_path = data._cached_path = Path(data.path)
+            data._cached_path_str = str(node_path)
+        is_selected = data._cached_path_str in self.selected_paths
 
         # Visual indicators
         if is_selected:
@@ -195,11 +370,12 @@ class VimDirectoryTree(DirectoryTree):
 
     def _toggle_selection(self, path: Path):
         """Toggle selection state of a single item"""
-        if path in self.selected_paths:
-            self.selected_paths.discard(path)
+        path_str = str(path)
+        if path_str in self.selected_paths:
+            self.selected_paths.discard(path_str)
         else:
             if not self._is_path_ignored(path):
-                self.selected_paths.add(path)
+                self.selected_paths.add(path_str)
             else:
                 self.app.bell()
                 return
@@ -212,25 +388,34 @@ class VimDirectoryTree(DirectoryTree):
             self._toggle_selection(path)
             return
 
-        new_state = path not in self.selected_paths
+        new_state = str(path) not in self.selected_paths
         self._apply_selection_recursive(path, new_state)
         self.refresh()
         self.post_message(self.SelectionChanged(self.selected_paths.copy(), self.project_root))
 
     def _apply_selection_recursive(self, path: Path, select: bool):
-        """Apply selection state recursively"""
+        """Apply selection state to a subtree iteratively, batching the set
+        mutations into one C-level update/difference_update. The walk uses
+        os.scandir so each entry's type comes from the directory listing
+        instead of a separate stat call."""
+        batch: List[str] = []
+        stack = [(path, str(path), path.is_dir())]
+        while stack:
+            current, current_str, current_is_dir = stack.pop()
+            if select and self._is_path_ignored(current):
+                continue  # nothing under an ignored path is ever selected
+            batch.append(current_str)
+            if current_is_dir:
+                try:
+                    with os.scandir(current) as entries:
+                        for entry in entries:
+                            stack.append((Path(entry.path), entry.path, entry.is_dir(follow_symlinks=False)))
+                except OSError:
+                    pass
         if select:
-            if not self._is_path_ignored(path):
-                self.selected_paths.add(path)
+            self.selected_paths.update(batch)
         else:
-            self.selected_paths.discard(path)
-
-        if path.is_dir():
-            try:
-                for child in path.iterdir():
-                    self._apply_selection_recursive(child, select)
-            except OSError:
-                pass
+            self.selected_paths.difference_update(batch)
 
     # Vim-style actions
     def action_cursor_down(self):
@@ -313,22 +498,35 @@ class VimDirectoryTree(DirectoryTree):
         files: Set[Path] = set()
         processed: Set[Path] = set()
 
-        for path in self.selected_paths:
+        for path_str in self.selected_paths:
+            path = Path(path_str)
             if path.is_file() and path not in processed:
                 if self._is_file_packable(path):
                     files.add(path)
                 processed.add(path)
-            elif path.is_dir():
-                try:
-                    for item in path.rglob("*"):
-                        if item.is_file() and item not in processed:
-                            if not self._is_path_ignored(item) and \
-                               not is_binary_heuristic(item) and \
-                               get_file_size_mb(item) <= MAX_FILE_SIZE_MB:
-                                files.add(item)
-                            processed.add(item)
-                except OSError:
-                    pass
+            elif path.is_dir() and not path.is_symlink():
+                # Stack-based os.scandir walk: one syscall per directory and
+                # type/size taken from the DirEntry, where rglob("*") paid a
+                # fresh stat for every is_file() check. Ignored directories
+                # are pruned before descending instead of being walked, and
+                # symlinked directories are never entered (no walk loops),
+                # though symlinks to regular files still count as files --
+                # the same contract as os.walk(followlinks=False).
+                stack = [path]
+                while stack:
+                    try:
+                        with os.scandir(stack.pop()) as entries:
+                            for entry in entries:
+                                entry_path = Path(entry.path)
+                                if entry.is_dir(follow_symlinks=False):
+                                    if not self._is_path_ignored(entry_path):
+                                        stack.append(entry_path)
+                                elif entry.is_file() and entry_path not in processed:
+                                    if self._entry_packable(entry, entry_path):
+                                        files.add(entry_path)
+                                    processed.add(entry_path)
+                    except OSError:
+                        pass
 
         # Convert to relative paths
         relative_files = []
@@ -422,6 +620,7 @@ class RepoPackerApp(App[None]):
         super().__init__()
         self.current_path = get_current_directory()
         self._tree: Optional[VimDirectoryTree] = None
+        self._sidebar_timer: Optional[Timer] = None
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -458,7 +657,15 @@ class RepoPackerApp(App[None]):
             self.status_text = "No files selected | space/x=select, X=recursive"
 
     async def on_vim_directory_tree_selection_changed(self, event: VimDirectoryTree.SelectionChanged):
-        """Handle selection changes"""
+        """Handle selection changes, debounced: the display rebuild walks
+        directories and binary-sniffs files, so rapid toggles collapse into
+        one rescan 150 ms after the last event instead of one per keypress."""
+        if self._sidebar_timer is not None:
+            self._sidebar_timer.stop()
+        self._sidebar_timer = self.set_timer(0.15, self._refresh_selected_files_display)
+
+    def _refresh_selected_files_display(self):
+        self._sidebar_timer = None
         self.update_selected_files_display()
 
     def update_selected_files_display(self):
@@ -533,50 +740,55 @@ Press `y` to copy to clipboard"""
         await self.action_yank_to_clipboard()
 
     def _generate_packed_content(self, files: List[Path]) -> str:
-        """Generate the packed content for selected files"""
-        lines = []
-
-        # Header
-        lines.extend([
-            "<repository_contents>",
-            f"Generated from: {self.current_path}",
-            f"Timestamp: {datetime.now().isoformat()}",
-            f"Files: {len(files)}",
-            "",
-            "<file_tree>",
-        ])
-
-        # File tree
-        for f in files:
-            lines.append(str(f).replace('\\', '/'))
-
-        lines.extend(["</file_tree>", "", "<files>"])
-
-        # File contents
-        for rel_path in files:
-            full_path = self.current_path / rel_path
-            try:
-                with open(full_path, 'r', encoding='utf-8', errors='replace') as f:
-                    content = f.read()
-
-                lines.extend([
-                    f'<file path="{str(rel_path).replace(chr(92), "/")}">',
-                    content,
-                    "</file>",
-                    ""
-                ])
-            except Exception as e:
-                lines.extend([
-                    f'<file path="{str(rel_path).replace(chr(92), "/")}" error="{e}">',
-                    f"Error reading file: {e}",
-                    "</file>",
-                    ""
-                ])
-
-        lines.append("</files>")
-        lines.append("</repository_contents>")
-
-        return "\n".join(lines)
+        """Generate the packed content for selected files, streaming chunks
+        through a spooled temp buffer. Each file's content is released right
+        after it is written, so the old list-of-chunks and the joined result
+        are never resident at the same time; big packs spill to disk."""
+        with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024, mode="w+", encoding="utf-8", newline="") as buf:
+            write = buf.write
+
+            # Header
+            write("<repository_contents>\n")
+            write(f"Generated from: {self.current_path}\n")
+            write(f"Timestamp: {datetime.now().isoformat()}\n")
+            write(f"Files: {len(files)}\n\n<file_tree>\n")
+
+            # File tree
+            for f in files:
+                write(str(f).replace('\\', '/') + "\n")
+
+            write("</file_tree>\n\n<files>\n")
+
+            # File contents: read concurrently (read() releases the GIL, so
+            # the requests overlap at the disk), write in selection order.
+            # Batching bounds both open fds and resident file contents.
+            def _read_one(full_path: Path):
+                try:
+                    # One bulk read + one decode; text mode would route every
+                    # chunk through the incremental decoder and newline
+                    # translation machinery.
+                    return full_path.read_bytes().decode('utf-8', 'replace'), None
+                except Exception as e:
+                    return None, e
+
+            batch_size = 16
+            if files:
+                with ThreadPoolExecutor(max_workers=batch_size) as pool:
+                    for start in range(0, len(files), batch_size):
+                        batch = files[start:start + batch_size]
+                        results = pool.map(_read_one, (self.current_path / rp for rp in batch))
+                        for rel_path, (content, error) in zip(batch, results):
+                            if error is None:
+                                write(f'<file path="{str(rel_path).replace(chr(92), "/")}">\n')
+                                write(content)
+                                write("\n</file>\n\n")
+                            else:
+                                write(f'<file path="{str(rel_path).replace(chr(92), "/")}" error="{error}">\n')
+                                write(f"Error reading file: {error}\n</file>\n\n")
+
+            write("</files>\n</repository_contents>")
+            buf.seek(0)
+            return buf.read()
 
     def action_select_all(self):
         """Select all files (a)"""